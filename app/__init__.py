@@ -1,34 +1,67 @@
+import importlib
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_mail import Mail
 from flask_caching import Cache
 
-# 1. Initialize the app
-app = Flask(__name__)
-
-# 2. Add configuration
-app.config['SECRET_KEY'] = 'a_very_secret_key_change_this'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Email Configuration (IMPORTANT: Set your credentials)
-app.config['MAIL_SERVER'] = 'smtp.googlemail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your_email@gmail.com'  # <-- ENTER YOUR GMAIL
-app.config['MAIL_PASSWORD'] = 'your_google_app_password' # <-- ENTER YOUR APP PASSWORD
-
-# Caching Configuration
-app.config['CACHE_TYPE'] = 'simple'
-
-# 3. Initialize extensions
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-mail = Mail(app)
-cache = Cache(app)
-login_manager.login_view = 'login'
+from app.config import Config
+
+# 1. Create the extensions unbound; create_app() attaches them to an app
+db = SQLAlchemy()
+login_manager = LoginManager()
+mail = Mail()
+cache = Cache()
+login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
 
-# 4. Import routes at the end to avoid circular imports
-from app import routes
\ No newline at end of file
+# Modules that are only needed on a few code paths. They are imported lazily
+# inside those paths; preload_heavy_modules() pulls them in ahead of time in
+# the gunicorn master so forked workers share the pages copy-on-write.
+HEAVY_MODULES = ('PIL.Image', 'app.scraper', 'app.trend_detector', 'pandas')
+
+
+def create_app(config_class=Config):
+    # 2. Initialize the app and add configuration
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    if app.config['PROXY_FIX_X_FOR']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # 3. Initialize extensions
+    db.init_app(app)
+    login_manager.init_app(app)
+    mail.init_app(app)
+    cache.init_app(app)
+
+    # 4. Register blueprints (imported here to avoid circular imports)
+    from app import models  # noqa: F401  registers the user_loader
+    from app.routes import main
+    from app.auth import auth
+    from app.admin import admin
+    from app.assets import assets, assets_cli
+    app.register_blueprint(main)
+    app.register_blueprint(auth)
+    app.register_blueprint(admin)
+    app.register_blueprint(assets)
+    app.cli.add_command(assets_cli)
+
+    from app.dedup import rebuild_index_command
+    from app.archive import archive_command
+    from app.schema import init_db_command
+    app.cli.add_command(rebuild_index_command)
+    app.cli.add_command(archive_command)
+    app.cli.add_command(init_db_command)
+
+    return app
+
+
+def preload_heavy_modules():
+    """Import the lazily loaded dependencies now, skipping any that are missing."""
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
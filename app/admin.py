@@ -0,0 +1,181 @@
+from flask import Blueprint, Response, current_app, render_template, url_for, flash, redirect, request, jsonify, stream_with_context
+from app import db, mail
+from app.forms import PublicInfoForm
+from app.models import User, Complaint, PublicInfo, Alert
+from app.dedup import duplicate_map, forget_complaint
+from app.archive import complaint_counts, search_complaints, iter_all_complaints, ARCHIVED_FIELDS
+from app.events import publish, stream, latest_event_id, acquire_stream_slot, release_stream_slot
+from flask_login import current_user, login_required
+import csv, io, os, secrets
+
+admin = Blueprint('admin', __name__, url_prefix='/admin')
+
+# --- HELPER FUNCTION TO SAVE UPLOADED PICTURES ---
+def save_picture(form_picture):
+    from PIL import Image  # only admins uploading pictures need Pillow
+
+    random_hex = secrets.token_hex(8)
+    _, f_ext = os.path.splitext(form_picture.filename)
+    picture_fn = random_hex + f_ext
+    picture_path = os.path.join(current_app.root_path, 'static/profile_pics', picture_fn)
+
+    # Resize image to save space and standardize size
+    output_size = (250, 250)
+    i = Image.open(form_picture)
+    i.thumbnail(output_size)
+    i.save(picture_path)
+
+    return picture_fn
+
+# --- Admin Control Panel Routes ---
+@admin.route("")
+@login_required
+def admin_dashboard():
+    if not current_user.is_admin:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.home'))
+    form = PublicInfoForm()
+    # Read before the page data: the stream resumes from here, so an event
+    # committed while the page renders is replayed rather than missed.
+    last_event_id = latest_event_id()
+    all_complaints = Complaint.query.order_by(Complaint.id.desc()).all()
+    all_users = User.query.order_by(User.id.asc()).all()
+    unread_alerts = Alert.query.filter_by(is_read=False).order_by(Alert.timestamp.desc()).all()
+    return render_template('admin_dashboard.html', title='Admin Dashboard', complaints=all_complaints, users=all_users, form=form, alerts=unread_alerts, duplicates=duplicate_map(), last_event_id=last_event_id)
+
+@admin.route("/events")
+@login_required
+def events():
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permission denied.'}), 403
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id', '')
+    last_id = int(last_id) if last_id.isdigit() else latest_event_id()
+    if not acquire_stream_slot():
+        return Response('Too many live dashboards, retry later.', status=503, headers={'Retry-After': '10'})
+    response = Response(stream_with_context(stream(last_id)), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(release_stream_slot)
+    return response
+
+@admin.route("/add_info", methods=['POST'])
+@login_required
+def add_public_info():
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+    form = PublicInfoForm()
+    if form.validate_on_submit():
+        picture_file = 'default.jpg'
+        if form.picture.data:
+            picture_file = save_picture(form.picture.data)
+        new_info = PublicInfo(name=form.name.data, details=form.details.data, category=form.category.data, image_file=picture_file)
+        db.session.add(new_info)
+        db.session.commit()
+        flash('New public record has been added successfully!', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route("/complaint/<int:complaint_id>/update_status", methods=['POST'])
+@login_required
+def update_complaint_status(complaint_id):
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'message': 'Permission denied.'}), 403
+    
+    complaint = Complaint.query.get_or_404(complaint_id)
+    data = request.get_json()
+    new_status = data.get('status') if data else request.form.get('status')
+
+    if new_status and complaint.status != new_status:
+        complaint.status = new_status
+        publish('status', id=complaint.id, status=new_status)
+        db.session.commit()
+        try:
+            from flask_mail import Message
+            msg = Message('Your Complaint Status Has Been Updated', sender=current_app.config['MAIL_USERNAME'], recipients=[complaint.author.email])
+            msg.html = render_template('email/status_update.html', user=complaint.author, complaint=complaint)
+            mail.send(msg)
+            message = f'Status for complaint #{complaint.id} updated to {new_status} and user notified.'
+            return jsonify({'success': True, 'message': message})
+        except Exception as e:
+            message = f'Status updated, but failed to send email: {e}'
+            return jsonify({'success': True, 'message': message})
+            
+    return jsonify({'success': False, 'message': 'No changes made.'})
+
+@admin.route("/complaint/<int:complaint_id>/delete")
+@login_required
+def delete_complaint(complaint_id):
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+    complaint = Complaint.query.get_or_404(complaint_id)
+    forget_complaint(complaint.id)
+    publish('deleted', id=complaint.id)
+    db.session.delete(complaint)
+    db.session.commit()
+    flash(f'Complaint #{complaint.id} has been deleted.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route("/user/<int:user_id>/delete")
+@login_required
+def delete_user(user_id):
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+    user = User.query.get_or_404(user_id)
+    if user.id == current_user.id:
+        flash("You cannot delete your own account.", 'danger')
+        return redirect(url_for('admin.admin_dashboard'))
+    db.session.delete(user)
+    db.session.commit()
+    flash(f'User {user.username} has been deleted.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+@admin.route("/user/<int:user_id>/toggle_admin")
+@login_required
+def toggle_admin(user_id):
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+    user = User.query.get_or_404(user_id)
+    if user.id == current_user.id:
+        flash("You cannot change your own admin status.", 'danger')
+        return redirect(url_for('admin.admin_dashboard'))
+    user.is_admin = not user.is_admin
+    db.session.commit()
+    status = "promoted to" if user.is_admin else "demoted from"
+    flash(f'User {user.username} has been {status} admin.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+# --- Analytics Dashboard Route ---
+@admin.route("/analytics")
+@login_required
+def analytics_dashboard():
+    if not current_user.is_admin:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.home'))
+    # Counts include archived complaints; near-duplicates are counted once
+    category_counts = dict(complaint_counts('category'))
+    sentiment_counts = dict(complaint_counts('sentiment'))
+    location_counts = dict(complaint_counts('location'))
+    return render_template('analytics.html', title='Analytics', category_data=category_counts, sentiment_data=sentiment_counts, location_data=location_counts)
+
+# --- Complaint Search and Export (hot and archived) ---
+@admin.route("/complaints/search")
+@login_required
+def search():
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+    query = request.args.get('q', '').strip()
+    results = search_complaints(query) if query else []
+    usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_({c.user_id for c in results}))) if results else {}
+    return render_template('complaint_search.html', title='Search Complaints', query=query, results=results, usernames=usernames)
+
+@admin.route("/complaints/export.csv")
+@login_required
+def export_complaints():
+    if not current_user.is_admin: return redirect(url_for('main.home'))
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ARCHIVED_FIELDS + ('archived',))
+        for complaint in iter_all_complaints():
+            writer.writerow([getattr(complaint, field) for field in ARCHIVED_FIELDS] + [hasattr(complaint, 'archived_at')])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=complaints.csv'})
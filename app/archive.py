@@ -0,0 +1,145 @@
+"""Hot/cold archival of resolved complaints.
+
+Resolved complaints older than ARCHIVE_AFTER_DAYS are moved from the
+complaint table into ArchivedComplaint. That table lives in its own SQLite
+file, set by the 'archive' entry of SQLALCHEMY_BINDS. Each batch first
+commits the copy and its ArchiveRollup counts to the archive database. Only
+then does it delete the originals. An interrupted run can simply be started
+again.
+
+Archived complaints keep their ids. The complaint table uses AUTOINCREMENT
+and its sequence starts above the highest archived id (app/schema.py), so
+those ids are never handed out again.
+
+Dashboards read the small hot table plus the rollup, whose size depends on
+the number of distinct category/sentiment/location values, not on history.
+Search and export read both tables.
+"""
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.dedup import is_unique
+from app.models import Complaint, ComplaintFingerprint, LshBucket, ArchivedComplaint, ArchiveRollup
+
+ARCHIVED_FIELDS = ('id', 'title', 'description', 'location', 'timestamp', 'status',
+                   'user_id', 'category', 'sentiment')
+
+
+def _fields(complaint):
+    return {field: getattr(complaint, field) for field in ARCHIVED_FIELDS}
+
+
+def _archive_batch(complaints):
+    """Archive one batch. Returns the ids of complaints left in the hot table."""
+    ids = [c.id for c in complaints]
+    duplicate_ids = {row.complaint_id for row in ComplaintFingerprint.query.filter(
+        ComplaintFingerprint.complaint_id.in_(ids), ComplaintFingerprint.duplicate_of_id.isnot(None))}
+    archived = {row.id: _fields(row) for row in ArchivedComplaint.query.filter(ArchivedComplaint.id.in_(ids))}
+
+    rollup, kept = Counter(), set()
+    for c in complaints:
+        if c.id in archived:
+            # The same complaint means an interrupted run copied it already.
+            # A different one took a reused id before complaint ids became
+            # AUTOINCREMENT (app/schema.py); it stays hot rather than be lost.
+            if archived[c.id] != _fields(c):
+                kept.add(c.id)
+            continue
+        db.session.add(ArchivedComplaint(is_duplicate=c.id in duplicate_ids,
+                                         **_fields(c)))
+        if c.id not in duplicate_ids:
+            rollup[(c.category, c.sentiment, c.location)] += 1
+    for (category, sentiment, location), count in rollup.items():
+        row = ArchiveRollup.query.filter_by(category=category, sentiment=sentiment, location=location).first()
+        if row is None:
+            db.session.add(ArchiveRollup(category=category, sentiment=sentiment, location=location, count=count))
+        else:
+            row.count += count
+    db.session.commit()
+
+    # The archive copy is safe; drop the hot rows and their duplicate-index
+    # entries. Links from other complaints to these ids are kept.
+    ids = [i for i in ids if i not in kept]
+    LshBucket.query.filter(LshBucket.complaint_id.in_(ids)).delete(synchronize_session=False)
+    ComplaintFingerprint.query.filter(ComplaintFingerprint.complaint_id.in_(ids)).delete(synchronize_session=False)
+    Complaint.query.filter(Complaint.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return kept
+
+
+def archive_resolved(max_age_days=None, batch_size=None, pause=None):
+    """Move old resolved complaints to the archive in batches.
+
+    Returns the number moved and the ids that had to stay in the hot table.
+    """
+    config = current_app.config
+    max_age_days = config['ARCHIVE_AFTER_DAYS'] if max_age_days is None else max_age_days
+    batch_size = batch_size or config['ARCHIVE_BATCH_SIZE']
+    pause = config['ARCHIVE_BATCH_PAUSE'] if pause is None else pause
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+
+    moved, kept, last_id = 0, [], 0
+    while True:
+        batch = Complaint.query.filter(Complaint.status == 'Resolved', Complaint.timestamp < cutoff,
+                                       Complaint.id > last_id) \
+            .order_by(Complaint.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        batch_kept = _archive_batch(batch)
+        moved += len(batch) - len(batch_kept)
+        kept.extend(sorted(batch_kept))
+        db.session.expunge_all()
+        # Short transactions with a gap between them keep the SQLite write
+        # lock free for complaints being filed in the meantime.
+        time.sleep(pause)
+    return moved, kept
+
+
+def complaint_counts(field):
+    """Counter of unique complaints by category, sentiment or location, hot and archived."""
+    hot_column = getattr(Complaint, field)
+    archived_column = getattr(ArchiveRollup, field)
+    counts = Counter(dict(
+        db.session.query(hot_column, db.func.count()).filter(is_unique(), hot_column.isnot(None))
+        .group_by(hot_column).all()))
+    counts.update(dict(
+        db.session.query(archived_column, db.func.sum(ArchiveRollup.count)).filter(archived_column.isnot(None))
+        .group_by(archived_column).all()))
+    return counts
+
+
+def search_complaints(query, limit=50):
+    """Complaints whose title or description contains the query, newest first, archive included."""
+    pattern = f"%{query}%"
+    hot = Complaint.query.filter(db.or_(Complaint.title.ilike(pattern), Complaint.description.ilike(pattern))) \
+        .order_by(Complaint.id.desc()).limit(limit).all()
+    archived = ArchivedComplaint.query.filter(
+        db.or_(ArchivedComplaint.title.ilike(pattern), ArchivedComplaint.description.ilike(pattern))) \
+        .order_by(ArchivedComplaint.id.desc()).limit(limit).all()
+    return sorted(hot + archived, key=lambda c: c.id, reverse=True)[:limit]
+
+
+def iter_all_complaints(batch_size=500):
+    """Yield every complaint, hot then archived, without loading them all at once."""
+    yield from Complaint.query.order_by(Complaint.id).yield_per(batch_size)
+    yield from ArchivedComplaint.query.order_by(ArchivedComplaint.id).yield_per(batch_size)
+
+
+@click.command('archive-complaints')
+@click.option('--days', type=int, default=None, help='Archive resolved complaints older than this (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Complaints moved per batch (default: ARCHIVE_BATCH_SIZE).')
+@with_appcontext
+def archive_command(days, batch_size):
+    """Move old resolved complaints into the archive database."""
+    moved, kept = archive_resolved(days, batch_size)
+    click.echo(f"Archived {moved} resolved complaints.")
+    if kept:
+        click.echo(f"Kept {len(kept)} in the hot table, their ids are taken by other archived complaints: "
+                   f"{', '.join(map(str, kept))}")
@@ -0,0 +1,261 @@
+"""Self-hosted, fingerprinted and precompressed static assets.
+
+Third-party libraries are vendored under static/vendor by `flask assets vendor`,
+which downloads the pinned versions in VENDOR_ASSETS; commit the result so
+deployments never need the CDNs. `flask assets build` copies the vendored
+files and our own CSS into static/dist under content-hashed names, writes
+.gz (and .br when the Brotli package is installed) variants next to text
+assets, and records the mapping in static/dist/manifest.json. Gunicorn
+runs the build before starting workers.
+
+Templates call asset_url('css/style.css'). It returns the fingerprinted
+/assets/ URL once the assets are built and the plain /static/ URL before
+that. A library with any file missing from static/vendor is served whole
+from its CDN instead, so its stylesheet never points at a missing font or
+image; the build logs a warning naming the missing files.
+
+/assets/ requests get no session, so their responses carry no
+Vary: Cookie and shared caches can reuse them.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import urllib.request
+
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone is still served
+    brotli = None
+
+assets = Blueprint('assets', __name__, url_prefix='/assets')
+
+# Local path under static/ -> pinned upstream URL
+VENDOR_ASSETS = {
+    'vendor/bootstrap/css/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css',
+    'vendor/fontawesome/webfonts/fa-brands-400.woff2': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-brands-400.woff2',
+    'vendor/fontawesome/webfonts/fa-regular-400.woff2': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-regular-400.woff2',
+    'vendor/fontawesome/webfonts/fa-solid-900.woff2': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-solid-900.woff2',
+    'vendor/fontawesome/webfonts/fa-v4compatibility.woff2': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-v4compatibility.woff2',
+    'vendor/fontawesome/webfonts/fa-brands-400.ttf': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-brands-400.ttf',
+    'vendor/fontawesome/webfonts/fa-regular-400.ttf': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-regular-400.ttf',
+    'vendor/fontawesome/webfonts/fa-solid-900.ttf': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-solid-900.ttf',
+    'vendor/fontawesome/webfonts/fa-v4compatibility.ttf': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/webfonts/fa-v4compatibility.ttf',
+    'vendor/chart.js/chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.js',
+    'vendor/leaflet/leaflet.css': 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css',
+    'vendor/leaflet/leaflet.js': 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js',
+    'vendor/leaflet/images/layers.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/layers.png',
+    'vendor/leaflet/images/layers-2x.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/layers-2x.png',
+    'vendor/leaflet/images/marker-icon.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon.png',
+    'vendor/leaflet/images/marker-icon-2x.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-icon-2x.png',
+    'vendor/leaflet/images/marker-shadow.png': 'https://unpkg.com/leaflet@1.9.4/dist/images/marker-shadow.png',
+    'vendor/leaflet.heat/leaflet-heat.js': 'https://unpkg.com/leaflet.heat@0.2.0/dist/leaflet-heat.js',
+}
+
+# Directories under static/ that go through the build
+SOURCE_DIRS = ('css', 'vendor')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt')
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _dist_folder():
+    return os.path.join(current_app.static_folder, 'dist')
+
+
+def _fingerprint(path, content):
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def _rewrite_css_urls(path, content, manifest):
+    """Point url(...) references in a stylesheet at the fingerprinted files."""
+    css_dir = posixpath.dirname(path)
+
+    def replace(match):
+        target = match.group(2)
+        if target.startswith(('data:', 'http:', 'https:', '//', '#', '/')):
+            return match.group(0)
+        bare = re.split(r'[?#]', target, maxsplit=1)[0]
+        resolved = posixpath.normpath(posixpath.join(css_dir, bare))
+        if resolved not in manifest:
+            return match.group(0)
+        # Fingerprinting keeps the directory, so the reference stays relative.
+        hashed = posixpath.relpath(manifest[resolved], css_dir)
+        return f"url({match.group(1)}{hashed}{target[len(bare):]}{match.group(1)})"
+
+    return CSS_URL_RE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def _write(dist, hashed, content):
+    target = os.path.join(dist, *hashed.split('/'))
+    if os.path.exists(target):  # content-addressed, so already up to date
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Compressed variants first: the plain file marks the asset as complete.
+    if hashed.endswith(COMPRESSIBLE):
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(target + '.gz', 'wb') as f:
+                f.write(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                with open(target + '.br', 'wb') as f:
+                    f.write(compressed)
+    with open(target, 'wb') as f:
+        f.write(content)
+    return True
+
+
+def _library(path):
+    return path.split('/')[1]  # vendor/<library>/...
+
+
+def missing_vendor_assets():
+    return [path for path in VENDOR_ASSETS
+            if not os.path.isfile(os.path.join(current_app.static_folder, *path.split('/')))]
+
+
+def _cdn_libraries():
+    """Libraries with a file missing from static/vendor, served from their CDN."""
+    libraries = current_app.extensions.get('asset_cdn_libraries')
+    if libraries is None:
+        libraries = current_app.extensions['asset_cdn_libraries'] = {
+            _library(path) for path in missing_vendor_assets()}
+    return libraries
+
+
+def build_assets():
+    """Fingerprint and precompress static assets into static/dist. Returns the number of new files."""
+    missing = missing_vendor_assets()
+    if missing:
+        current_app.logger.warning("%d vendored assets are missing, their libraries are served from the CDN "
+                                   "until `flask assets vendor` is run and static/vendor committed: %s",
+                                   len(missing), ', '.join(missing))
+    static, dist = current_app.static_folder, _dist_folder()
+    sources = []
+    for source_dir in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(static, source_dir)):
+            for filename in filenames:
+                sources.append(os.path.relpath(os.path.join(dirpath, filename), static).replace(os.sep, '/'))
+
+    # Stylesheets last, so the files they reference already have their hashed names.
+    manifest, written = {}, 0
+    for path in sorted(sources, key=lambda p: (p.endswith('.css'), p)):
+        with open(os.path.join(static, path), 'rb') as f:
+            content = f.read()
+        if path.endswith('.css'):
+            content = _rewrite_css_urls(path, content, manifest)
+        manifest[path] = _fingerprint(path, content)
+        written += _write(dist, manifest[path], content)
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, 'manifest.json.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(os.path.join(dist, 'manifest.json.tmp'), os.path.join(dist, 'manifest.json'))
+    current_app.extensions.pop('asset_manifest', None)
+    current_app.extensions.pop('asset_cdn_libraries', None)
+    return written
+
+
+def _manifest():
+    manifest = current_app.extensions.get('asset_manifest')
+    if manifest is None:
+        try:
+            with open(os.path.join(_dist_folder(), 'manifest.json')) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        current_app.extensions['asset_manifest'] = manifest
+    return manifest
+
+
+def asset_url(path):
+    if path in VENDOR_ASSETS and _library(path) in _cdn_libraries():
+        return VENDOR_ASSETS[path]
+    manifest = _manifest()
+    if path in manifest:
+        return url_for('assets.static_asset', filename=manifest[path])
+    return url_for('static', filename=path)
+
+
+class _AssetSessionInterface(SecureCookieSessionInterface):
+    """No session for /assets/ requests.
+
+    Flask adds Vary: Cookie to any response whose session was read, and
+    Flask-Login reads it after every request; that would keep shared caches
+    from reusing the immutable assets.
+    """
+
+    def open_session(self, app, request):
+        if request.path.startswith(assets.url_prefix + '/'):
+            return self.make_null_session(app)
+        return super().open_session(app, request)
+
+
+@assets.record_once
+def _skip_session_for_assets(state):
+    state.app.session_interface = _AssetSessionInterface()
+
+
+@assets.app_context_processor
+def inject_asset_url():
+    return {'asset_url': asset_url}
+
+
+@assets.route('/<path:filename>')
+def static_asset(filename):
+    """Serve a built asset, preferring a precompressed variant the client accepts."""
+    dist = _dist_folder()
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        variant = safe_join(dist, filename + suffix)
+        if request.accept_encodings[encoding] and variant and os.path.isfile(variant):
+            response = send_from_directory(dist, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(dist, filename, mimetype=mimetype)
+    # The name changes whenever the content does, so it can be cached forever.
+    response.headers['Cache-Control'] = f'public, max-age={ONE_YEAR}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@click.group('assets')
+def assets_cli():
+    """Vendor and build static assets."""
+
+
+@assets_cli.command('vendor')
+@with_appcontext
+def vendor_command():
+    """Download the pinned third-party libraries into static/vendor."""
+    for path, url in VENDOR_ASSETS.items():
+        target = os.path.join(current_app.static_folder, *path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response, open(target, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        click.echo(f"{path} <- {url}")
+
+
+@assets_cli.command('build')
+@with_appcontext
+def build_command():
+    """Fingerprint and precompress static assets into static/dist."""
+    written = build_assets()
+    click.echo(f"Built {written} new assets into {_dist_folder()}"
+               f"{'' if brotli else ' (install Brotli for .br variants)'}.")
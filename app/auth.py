@@ -0,0 +1,44 @@
+from flask import Blueprint, render_template, url_for, flash, redirect
+from app import db
+from app.forms import RegistrationForm, LoginForm
+from app.models import User
+from flask_login import login_user, current_user, logout_user, login_required
+from app.ratelimit import rate_limit
+
+auth = Blueprint('auth', __name__)
+
+# --- Authentication Routes ---
+@auth.route("/login", methods=['GET', 'POST'])
+@rate_limit('login')
+def login():
+    if current_user.is_authenticated: return redirect(url_for('main.home'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(email=form.email.data).first()
+        if user and user.check_password(form.password.data):
+            login_user(user, remember=True)
+            flash('You have been logged in successfully!', 'success')
+            return redirect(url_for('main.home'))
+        else:
+            flash('Login Unsuccessful. Please check email and password.', 'danger')
+    return render_template('login.html', title='Login', form=form)
+
+@auth.route("/register", methods=['GET', 'POST'])
+@rate_limit('register')
+def register():
+    if current_user.is_authenticated: return redirect(url_for('main.home'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(username=form.username.data, email=form.email.data)
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Account created successfully! You can now log in.', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', title='Register', form=form)
+
+@auth.route("/logout")
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('main.home'))
@@ -0,0 +1,69 @@
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'a_very_secret_key_change_this')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///site.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Archived complaints live in their own SQLite file (app/archive.py)
+    SQLALCHEMY_BINDS = {'archive': os.environ.get('ARCHIVE_DATABASE_URL', 'sqlite:///archive.db')}
+
+    # Email Configuration (IMPORTANT: Set your credentials)
+    MAIL_SERVER = 'smtp.googlemail.com'
+    MAIL_PORT = 587
+    MAIL_USE_TLS = True
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME', 'your_email@gmail.com')  # <-- ENTER YOUR GMAIL
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD', 'your_google_app_password')  # <-- ENTER YOUR APP PASSWORD
+
+    # Caching Configuration
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')
+
+    # Source of the crime headlines on the home page (app/scraper.py)
+    NEWS_URL = os.environ.get('NEWS_URL', 'https://www.indiatoday.in/crime')
+
+    # Chatbot intents: edit the JSON file to add intents, no code change needed
+    INTENTS_PATH = os.environ.get('INTENTS_PATH', os.path.join(basedir, 'intents.json'))
+    INTENT_CACHE_SIZE = 4096
+
+    # Near-duplicate complaints (app/dedup.py). 16 bands of 4 rows catch pairs
+    # above roughly 0.5 similarity; run `flask dedup-index` after changing these.
+    DEDUP_NUM_PERM = 64
+    DEDUP_BANDS = 16
+    DEDUP_THRESHOLD = 0.6
+    # Only complaints filed within this many days of each other, at the same
+    # location, can be duplicates; older reports are a new incident.
+    DEDUP_WINDOW_DAYS = 2
+
+    # Resolved complaints older than this are moved to the archive by
+    # `flask archive-complaints`; run it daily from cron or a scheduler.
+    ARCHIVE_AFTER_DAYS = 180
+    ARCHIVE_BATCH_SIZE = 500
+    ARCHIVE_BATCH_PAUSE = 0.2  # seconds between batches
+
+    # Server-sent events for the admin dashboard (app/events.py). Keep
+    # SSE_MAX_STREAMS below the gunicorn thread count so pages still get served.
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 4))  # can be far higher with gevent workers
+    SSE_STREAM_TIMEOUT = 300  # seconds; the browser reconnects with Last-Event-ID
+    SSE_POLL_INTERVAL = 2  # seconds; how soon events from other workers show up
+    SSE_RETRY_MS = 3000
+    SSE_EVENT_RETENTION_HOURS = 24
+
+    # Token-bucket budgets per client as (requests, per seconds), see app/ratelimit.py.
+    # The SQLite file is shared by all workers; relative paths go in instance/.
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'sqlite:///ratelimit.db')
+    RATELIMIT_LOCK_TIMEOUT = 0.05  # seconds to wait for the SQLite write lock before allowing the request
+    RATELIMITS = {
+        'login': (10, 60),
+        'register': (5, 600),
+        'file_complaint': (5, 60),
+        'ask_ai': (30, 60),
+    }
+    # Number of proxies in front of the app, so clients are told apart by
+    # X-Forwarded-For instead of the proxy's address. Without it every
+    # anonymous client shares one rate-limit bucket. Defaults to 1 on a Heroku
+    # dyno (DYNO is set there) for its router, 0 elsewhere; set it explicitly
+    # behind any other proxy or load balancer.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1 if 'DYNO' in os.environ else 0))
@@ -0,0 +1,172 @@
+"""Near-duplicate complaint detection with MinHash and locality-sensitive hashing.
+
+Each description is cut into word shingles and summarised by a MinHash
+signature. The signature is split into bands, and every band is stored as a
+row in LshBucket. Two complaints whose descriptions are similar enough will
+very likely share at least one band. Finding candidates for a new complaint
+is therefore an indexed lookup of its band keys, not a scan of the history.
+The candidates are then checked against their stored signatures.
+
+Only complaints filed at the same location within DEDUP_WINDOW_DAYS of each
+other can be duplicates, so a later spike of similar reports is counted as
+new incidents rather than folded into an old one.
+
+A complaint found to be a duplicate is linked to the first complaint of its
+cluster through ComplaintFingerprint.duplicate_of_id.
+"""
+import hashlib
+import random
+import re
+from array import array
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import Complaint, ComplaintFingerprint, LshBucket
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+
+_permutations = {}
+
+
+def _get_permutations(num_perm):
+    # Fixed seed: signatures stored in the database must stay comparable.
+    if num_perm not in _permutations:
+        rng = random.Random(1)
+        _permutations[num_perm] = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME))
+                                   for _ in range(num_perm)]
+    return _permutations[num_perm]
+
+
+def _hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def shingles(text):
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text, num_perm):
+    hashes = [_hash(s.encode('utf-8')) for s in shingles(text)]
+    if not hashes:
+        return [MERSENNE_PRIME] * num_perm
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _get_permutations(num_perm)]
+
+
+def band_keys(signature, bands):
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        chunk = array('Q', signature[band * rows:(band + 1) * rows]).tobytes()
+        keys.append(f"{band:02d}:{hashlib.blake2b(chunk, digest_size=16).hexdigest()}")
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def normalize_location(location):
+    # Same normalization as the trend detector's grouping.
+    return location.lower().strip() if location else 'unknown'
+
+
+def _settings():
+    config = current_app.config
+    return config['DEDUP_NUM_PERM'], config['DEDUP_BANDS'], config['DEDUP_THRESHOLD']
+
+
+def index_complaint(complaint):
+    """Fingerprint a new complaint and link it to a likely duplicate.
+
+    The complaint must already have an id (flush the session first). The
+    caller commits. Returns the id of the complaint it duplicates, or None.
+    """
+    num_perm, bands, threshold = _settings()
+    window = timedelta(days=current_app.config['DEDUP_WINDOW_DAYS'])
+    signature = minhash(complaint.description, num_perm)
+    keys = band_keys(signature, bands)
+
+    candidate_ids = {row.complaint_id for row in
+                     LshBucket.query.filter(LshBucket.band_key.in_(keys)).all()}
+    candidate_ids.discard(complaint.id)
+
+    duplicate_of = None
+    if candidate_ids:
+        best = 0.0
+        candidates = db.session.query(ComplaintFingerprint, Complaint.location).join(
+            Complaint, Complaint.id == ComplaintFingerprint.complaint_id).filter(
+            ComplaintFingerprint.complaint_id.in_(candidate_ids),
+            Complaint.timestamp.between(complaint.timestamp - window, complaint.timestamp + window)).all()
+        for fp, location in candidates:
+            if normalize_location(location) != normalize_location(complaint.location):
+                continue
+            score = similarity(signature, array('Q', fp.signature))
+            if score >= threshold and score > best:
+                best = score
+                # Always point at the first complaint of the cluster.
+                duplicate_of = fp.duplicate_of_id or fp.complaint_id
+
+    db.session.add(ComplaintFingerprint(complaint_id=complaint.id, signature=array('Q', signature).tobytes(),
+                                        duplicate_of_id=duplicate_of))
+    db.session.add_all(LshBucket(band_key=key, complaint_id=complaint.id) for key in keys)
+    return duplicate_of
+
+
+def forget_complaint(complaint_id):
+    """Drop a complaint from the index before it is deleted. The caller commits."""
+    LshBucket.query.filter_by(complaint_id=complaint_id).delete()
+    ComplaintFingerprint.query.filter_by(complaint_id=complaint_id).delete()
+    ComplaintFingerprint.query.filter_by(duplicate_of_id=complaint_id).update({'duplicate_of_id': None})
+
+
+def duplicate_map():
+    """{complaint_id: duplicate_of_id} for every complaint flagged as a duplicate."""
+    rows = db.session.query(ComplaintFingerprint.complaint_id, ComplaintFingerprint.duplicate_of_id) \
+        .filter(ComplaintFingerprint.duplicate_of_id.isnot(None)).all()
+    return dict(rows)
+
+
+def is_unique():
+    """Filter for Complaint queries that leaves out flagged duplicates."""
+    duplicates = db.session.query(ComplaintFingerprint.complaint_id) \
+        .filter(ComplaintFingerprint.duplicate_of_id.isnot(None))
+    return Complaint.id.notin_(duplicates)
+
+
+@click.command('dedup-index')
+@click.option('--batch-size', default=500, show_default=True, help='Complaints committed per batch.')
+@with_appcontext
+def rebuild_index_command(batch_size):
+    """Rebuild the duplicate index and cluster every existing complaint."""
+    LshBucket.query.delete()
+    ComplaintFingerprint.query.delete()
+    db.session.commit()
+
+    total = duplicates = 0
+    last_id = 0
+    while True:
+        # Oldest first, so each cluster is rooted at its earliest complaint.
+        batch = Complaint.query.filter(Complaint.id > last_id).order_by(Complaint.id).limit(batch_size).all()
+        if not batch:
+            break
+        for complaint in batch:
+            if index_complaint(complaint) is not None:
+                duplicates += 1
+            # Later complaints in this batch must see this one's buckets.
+            db.session.flush()
+        db.session.commit()
+        total += len(batch)
+        last_id = batch[-1].id
+        click.echo(f"Indexed {total} complaints...")
+
+    click.echo(f"Done: {total} complaints indexed, {duplicates} flagged as duplicates.")
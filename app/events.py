@@ -0,0 +1,116 @@
+"""Server-sent events for the admin dashboard.
+
+publish() adds an Event row to the current session, so an event only exists
+once the change it describes is committed. The row id is the SSE event id,
+and a reconnecting browser sends it back as Last-Event-ID to resume. After a
+commit that published something, the in-process broker wakes every stream
+in this worker immediately. Streams in other workers find the row on their
+next poll, within SSE_POLL_INTERVAL seconds.
+
+Streams end after SSE_STREAM_TIMEOUT and the browser reconnects by itself.
+Each worker holds at most SSE_MAX_STREAMS of them, so connected dashboards
+never use up the threads that serve normal pages.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Event
+
+
+class Broker:
+    """Wakes up waiting streams when new events are committed in this process."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+
+    def notify(self):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Block until notify() is called after `version` was seen, or timeout."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version, timeout)
+
+    @property
+    def version(self):
+        return self._version
+
+
+broker = Broker()
+_last_prune = 0.0
+_stream_slots = None
+_stream_slots_lock = threading.Lock()
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _notify_after_commit(session):
+    if session.info.pop('events_published', False):
+        broker.notify()
+
+
+def publish(kind, **data):
+    """Queue an event on the current session; it is sent when the caller commits."""
+    global _last_prune
+    db.session.add(Event(kind=kind, payload=json.dumps(data, default=str)))
+    db.session.info['events_published'] = True
+    if time.monotonic() - _last_prune > 300:
+        _last_prune = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(hours=current_app.config['SSE_EVENT_RETENTION_HOURS'])
+        Event.query.filter(Event.timestamp < cutoff).delete()
+
+
+def latest_event_id():
+    last_id = db.session.query(db.func.max(Event.id)).scalar() or 0
+    db.session.rollback()
+    return last_id
+
+
+def _events_after(last_id, limit=100):
+    rows = db.session.query(Event.id, Event.kind, Event.payload) \
+        .filter(Event.id > last_id).order_by(Event.id).limit(limit).all()
+    # End the read transaction so an idle stream never holds a SQLite lock.
+    db.session.rollback()
+    return rows
+
+
+def stream(last_id):
+    """Yield SSE frames for events after `last_id` until the stream times out."""
+    config = current_app.config
+    deadline = time.monotonic() + config['SSE_STREAM_TIMEOUT']
+    keepalive = time.monotonic() + 15
+    yield f"retry: {config['SSE_RETRY_MS']}\n\n"
+    while time.monotonic() < deadline:
+        version = broker.version
+        rows = _events_after(last_id)
+        for event_id, kind, payload in rows:
+            last_id = event_id
+            yield f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n"
+        if rows:
+            continue
+        if time.monotonic() > keepalive:
+            keepalive = time.monotonic() + 15
+            yield ": keepalive\n\n"
+        broker.wait(version, config['SSE_POLL_INTERVAL'])
+
+
+def acquire_stream_slot():
+    """Reserve one of this worker's SSE_MAX_STREAMS; False when all are taken."""
+    global _stream_slots
+    with _stream_slots_lock:
+        if _stream_slots is None:
+            _stream_slots = threading.BoundedSemaphore(current_app.config['SSE_MAX_STREAMS'])
+    return _stream_slots.acquire(blocking=False)
+
+
+def release_stream_slot():
+    _stream_slots.release()
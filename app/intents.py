@@ -0,0 +1,100 @@
+import json
+import re
+from functools import lru_cache
+
+from flask import current_app
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+
+class Pattern:
+    """All terms of a pattern must be present for it to match.
+
+    A term is a whole word ("hi" does not match "this"), a prefix ending in
+    "*" ("person*" matches "persons"), or a phrase of several words that
+    must appear next to each other ("most wanted").
+    """
+
+    def __init__(self, terms):
+        self.words, self.prefixes, self.phrases = set(), [], []
+        for term in terms:
+            parts = tokenize(term)
+            if term.endswith('*'):
+                self.prefixes.append(parts[0])
+            elif len(parts) > 1:
+                self.phrases.append(' ' + ' '.join(parts) + ' ')
+                self.words.update(parts)
+            else:
+                self.words.update(parts)
+        self.words = frozenset(self.words)
+        self.prefixes = tuple(self.prefixes)
+        self.phrases = tuple(self.phrases)
+
+    def matches(self, tokens, token_set, padded):
+        return (self.words <= token_set
+                and all(any(t.startswith(p) for t in tokens) for p in self.prefixes)
+                and all(phrase in padded for phrase in self.phrases))
+
+
+class IntentEngine:
+    """Matches chatbot messages against intents loaded from a JSON file.
+
+    Intents are tried in file order and the first matching one wins. Patterns
+    are indexed by their required words, so a message is only checked against
+    the patterns that could possibly match it. Replies are cached per
+    normalized message.
+    """
+
+    def __init__(self, intents, fallback, cache_size=4096):
+        self.fallback = fallback
+        self.patterns = []  # (priority, Pattern, response)
+        self.index = {}     # required word -> patterns needing it
+        self.unindexed = [] # patterns with only prefix terms
+        for priority, intent in enumerate(intents):
+            for terms in intent['patterns']:
+                entry = (priority, Pattern(terms), intent['response'])
+                self.patterns.append(entry)
+                if entry[1].words:
+                    # Any one required word is enough to find the pattern.
+                    anchor = min(entry[1].words)
+                    self.index.setdefault(anchor, []).append(entry)
+                else:
+                    self.unindexed.append(entry)
+        self._cached_reply = lru_cache(maxsize=cache_size)(self._match)
+
+    @classmethod
+    def from_file(cls, path, cache_size=4096):
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config['intents'], config['fallback'], cache_size)
+
+    def _match(self, tokens):
+        token_set = frozenset(tokens)
+        padded = ' ' + ' '.join(tokens) + ' '
+        candidates = list(self.unindexed)
+        for token in token_set:
+            candidates.extend(self.index.get(token, ()))
+        for _, pattern, response in sorted(candidates, key=lambda entry: entry[0]):
+            if pattern.matches(tokens, token_set, padded):
+                return response
+        return self.fallback
+
+    def reply(self, message):
+        return self._cached_reply(tokenize(message))
+
+    def cache_info(self):
+        return self._cached_reply.cache_info()
+
+
+def get_intent_engine():
+    """Return the app's intent engine, building it on first use."""
+    engine = current_app.extensions.get('intent_engine')
+    if engine is None:
+        engine = IntentEngine.from_file(current_app.config['INTENTS_PATH'],
+                                        current_app.config['INTENT_CACHE_SIZE'])
+        current_app.extensions['intent_engine'] = engine
+    return engine
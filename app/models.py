@@ -22,6 +22,8 @@ class User(db.Model, UserMixin):
         return check_password_hash(self.password_hash, password)
 
 class Complaint(db.Model):
+    # AUTOINCREMENT: ids are never reused, archived complaints keep theirs.
+    __table_args__ = {'sqlite_autoincrement': True}
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -44,4 +46,47 @@ class Alert(db.Model):
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    is_read = db.Column(db.Boolean, default=False)
\ No newline at end of file
+    is_read = db.Column(db.Boolean, default=False)
+
+class Event(db.Model):
+    """Change pushed to admin dashboards over server-sent events (see app/events.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class ComplaintFingerprint(db.Model):
+    """MinHash signature of a complaint description (see app/dedup.py)."""
+    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), primary_key=True)
+    signature = db.Column(db.LargeBinary, nullable=False)
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), nullable=True, index=True)
+
+class LshBucket(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    band_key = db.Column(db.String(40), nullable=False, index=True)
+    complaint_id = db.Column(db.Integer, db.ForeignKey('complaint.id'), nullable=False, index=True)
+
+class ArchivedComplaint(db.Model):
+    """Resolved complaint moved out of the hot table (see app/archive.py)."""
+    __bind_key__ = 'archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # same id as the original complaint
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    location = db.Column(db.String(200), nullable=True)
+    timestamp = db.Column(db.DateTime, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    category = db.Column(db.String(50), nullable=False, index=True)
+    sentiment = db.Column(db.String(20), nullable=False)
+    is_duplicate = db.Column(db.Boolean, nullable=False, default=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ArchiveRollup(db.Model):
+    """Running counts of archived complaints, so analytics never scans the archive."""
+    __bind_key__ = 'archive'
+    __table_args__ = (db.Index('ix_archive_rollup_key', 'category', 'sentiment', 'location'),)
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), nullable=False)
+    sentiment = db.Column(db.String(20), nullable=False)
+    location = db.Column(db.String(200), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,161 @@
+"""Token-bucket rate limiting for write endpoints.
+
+Every budgeted route gets a bucket per client: the logged-in user id, or the
+client IP for anonymous requests. A bucket holds `capacity` tokens and
+refills at capacity/period tokens per second; each request takes one.
+Budgets are (capacity, period in seconds) pairs in the RATELIMITS config.
+
+Buckets are kept in a small SQLite file shared by all gunicorn workers on
+the host (RATELIMIT_STORAGE_URL), so a client cannot multiply its budget by
+landing on different workers. 'memory://' keeps them per process instead.
+
+A take that cannot get the SQLite write lock within RATELIMIT_LOCK_TIMEOUT
+lets the request through (logged) instead of stalling the worker. Under
+gevent the SQLite call runs in the hub's threadpool, so it never blocks
+the other greenlets.
+
+@rate_limit must sit directly under the route decorator. It reads the user
+id straight from the session, so an over-limit request gets its 429 before
+login_required loads the user, the form is validated or a password is hashed.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+
+try:
+    from gevent import get_hub
+    from gevent.monkey import is_module_patched
+except ImportError:  # optional: only the gevent serving mode needs it
+    get_hub = None
+
+
+def _off_hub(func, *args):
+    """Call a blocking function, in gevent's threadpool when gevent is patched in."""
+    if get_hub is not None and is_module_patched('threading'):
+        return get_hub().threadpool.apply(func, args)
+    return func(*args)
+
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        """Take a token. Returns 0 if allowed, else the seconds until one is available."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, retry_after = _refill_and_take(tokens, updated, now, capacity, period)
+            self._buckets[key] = (tokens, now)
+        return retry_after
+
+
+class SQLiteBucketStore:
+    PRUNE_EVERY = 600  # seconds between sweeps of idle buckets
+
+    def __init__(self, path, timeout=0.05):
+        self.path = path
+        self.timeout = timeout
+        self._conn, self._pid = None, None
+        # One connection per process, shared by its threads or greenlets; a
+        # take is a few dozen microseconds, so serializing them costs little.
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        with self._lock:
+            self._connect().execute(
+                "CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def _connect(self):
+        # Reopened after a fork; the caller holds the lock.
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    def take(self, key, capacity, period):
+        """Take a token. Returns 0 if allowed, else the seconds until one is available."""
+        # The lock is taken here, not in the threadpool: under gevent it is a
+        # greenlet lock.
+        with self._lock:
+            try:
+                return _off_hub(self._take, self._connect(), key, capacity, period)
+            except sqlite3.OperationalError as e:  # busy past the timeout: fail open
+                current_app.logger.warning("Rate limit store unavailable, allowing request: %s", e)
+                return 0
+
+    def _take(self, conn, key, capacity, period):
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so concurrent workers
+        # serialize on the read-modify-write of the bucket.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, retry_after = _refill_and_take(tokens, updated, now, capacity, period)
+            conn.execute("INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+            if now - self._last_prune > self.PRUNE_EVERY:
+                self._last_prune = now
+                # A bucket idle for a day has refilled under any sane budget.
+                conn.execute("DELETE FROM bucket WHERE updated < ?", (now - 86400,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return retry_after
+
+
+def _refill_and_take(tokens, updated, now, capacity, period):
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) * period / capacity
+
+
+def get_bucket_store():
+    store = current_app.extensions.get('rate_limiter')
+    if store is None:
+        url = current_app.config['RATELIMIT_STORAGE_URL']
+        if url == 'memory://':
+            store = MemoryBucketStore()
+        else:
+            path = url[len('sqlite:///'):]
+            if not os.path.isabs(path):
+                os.makedirs(current_app.instance_path, exist_ok=True)
+                path = os.path.join(current_app.instance_path, path)
+            store = SQLiteBucketStore(path, current_app.config['RATELIMIT_LOCK_TIMEOUT'])
+        current_app.extensions['rate_limiter'] = store
+    return store
+
+
+def _client_key():
+    user_id = session.get('_user_id')  # set by flask-login; no database lookup
+    return f"user:{user_id}" if user_id else f"ip:{request.remote_addr}"
+
+
+def rate_limit(budget, methods=('POST',)):
+    """Limit a view to the RATELIMITS[budget] token bucket per client."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            config = current_app.config
+            if config['RATELIMIT_ENABLED'] and request.method in methods:
+                capacity, period = config['RATELIMITS'][budget]
+                retry_after = get_bucket_store().take(f"{budget}:{_client_key()}", capacity, period)
+                if retry_after:
+                    headers = {'Retry-After': str(math.ceil(retry_after))}
+                    message = 'Too many requests. Please slow down and try again shortly.'
+                    if request.is_json:
+                        return jsonify({'success': False, 'message': message, 'reply': message}), 429, headers
+                    return message, 429, headers
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
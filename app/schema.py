@@ -0,0 +1,79 @@
+"""Database schema setup.
+
+There is no migration tool: create_schema() creates any missing tables in
+the main database and in every bind (the archive file included). The few
+changes create_all() cannot make to an existing table are applied here as
+well, each guarded so it runs only once.
+
+create_app() never touches the database. The schema step runs explicitly:
+gunicorn's on_starting hook runs it once in the master before workers fork,
+`python run.py` runs it before serving, and `flask init-db` runs it for
+`flask run` or by hand after an upgrade.
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app import db
+from app.models import ArchivedComplaint, Complaint
+
+
+def create_schema():
+    db.create_all()
+    if db.engine.dialect.name == 'sqlite':
+        _complaint_autoincrement()
+        _reserve_archived_ids()
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create missing tables and apply pending schema changes."""
+    create_schema()
+    click.echo("Database schema is up to date.")
+
+
+def _complaint_autoincrement():
+    """Rebuild a complaint table created without AUTOINCREMENT.
+
+    Without it SQLite hands out the id of the newest deleted row again, and
+    archived complaints keep their ids, so a new complaint could take the id
+    of an archived one.
+    """
+    with db.engine.connect() as conn:
+        sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'complaint'").scalar()
+    if 'AUTOINCREMENT' in sql.upper():
+        return
+
+    table = Complaint.__table__
+    columns = ', '.join(column.name for column in table.columns)
+    statements = ["ALTER TABLE complaint RENAME TO complaint_old"]
+    statements += [f"DROP INDEX IF EXISTS {index.name}" for index in table.indexes]
+    statements.append(str(CreateTable(table).compile(db.engine)).strip())
+    statements += [str(CreateIndex(index).compile(db.engine)) for index in table.indexes]
+    statements += [f"INSERT INTO complaint ({columns}) SELECT {columns} FROM complaint_old",
+                   "DROP TABLE complaint_old"]
+
+    raw = db.engine.raw_connection()
+    try:
+        # One transaction, so an interrupted rebuild leaves the old table.
+        # legacy_alter_table stops the rename from repointing the foreign
+        # keys of other tables at complaint_old.
+        raw.driver_connection.executescript(
+            "PRAGMA legacy_alter_table = ON;\nBEGIN;\n" + ';\n'.join(statements) +
+            ";\nCOMMIT;\nPRAGMA legacy_alter_table = OFF;")
+    finally:
+        raw.close()
+
+
+def _reserve_archived_ids():
+    """Never hand out an id that an archived complaint already has."""
+    archived_max = db.session.query(db.func.max(ArchivedComplaint.id)).scalar() or 0
+    db.session.rollback()
+    with db.engine.begin() as conn:
+        seq = conn.exec_driver_sql("SELECT seq FROM sqlite_sequence WHERE name = 'complaint'").scalar()
+        if seq is None:
+            conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('complaint', ?)", (archived_max,))
+        elif seq < archived_max:
+            conn.exec_driver_sql("UPDATE sqlite_sequence SET seq = ? WHERE name = 'complaint'", (archived_max,))
@@ -3,10 +3,10 @@ from bs4 import BeautifulSoup
 
 NEWS_URL = "https://www.indiatoday.in/crime"
 
-def fetch_crime_news():
+def fetch_crime_news(url=NEWS_URL):
     news_list = []
     try:
-        response = requests.get(NEWS_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
         response.raise_for_status()
         soup = BeautifulSoup(response.content, 'html.parser')
         articles = soup.find_all('div', class_='B1S3_content__wrap__9mSB6', limit=5)
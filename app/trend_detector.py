@@ -1,14 +1,18 @@
-import pandas as pd
 from datetime import datetime, timedelta
 from app.models import Complaint, Alert
+from app.dedup import is_unique
+from app.events import publish
 from app import db
 
 def detect_crime_trends():
     """Analyzes complaint data to find recent spikes in crime categories."""
+    import pandas as pd  # deferred: pandas alone costs more to import than the rest of the app
+
     print(f"[{datetime.now()}] AI Trend Detector: Starting analysis...")
     
     seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    complaints = Complaint.query.filter(Complaint.timestamp >= seven_days_ago).all()
+    # Near-duplicate reports of one incident must not look like a spike
+    complaints = Complaint.query.filter(Complaint.timestamp >= seven_days_ago, is_unique()).all()
 
     if len(complaints) < 5:  # Don't run on very small datasets
         print("AI Trend Detector: Not enough recent complaints to analyze.")
@@ -41,6 +45,8 @@ def detect_crime_trends():
                 description=f"Detected {row['count']} reports of '{row['category']}' in {row['location'].title()} on {alert_date.strftime('%Y-%m-%d')}."
             )
             db.session.add(alert)
+            db.session.flush()
+            publish('alert', id=alert.id, title=alert.title, description=alert.description)
             print(f"AI Trend Detector: New trend found - {alert.description}")
 
     db.session.commit()
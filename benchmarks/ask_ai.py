@@ -0,0 +1,96 @@
+"""Measure /ask_ai throughput in a single process.
+
+Times the intent engine on its own (cold and cached) and the full Flask
+request path through the test client, which is what one worker pays per
+chatbot message minus the network. The request path is timed with rate
+limiting off, then on with a budget too large to run out, so the
+difference is the cost of the per-request SQLite bucket write.
+
+    python benchmarks/ask_ai.py [--requests 20000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.intents import get_intent_engine  # noqa: E402
+from app.ratelimit import SQLiteBucketStore  # noqa: E402
+
+MESSAGES = [
+    "How do I report a crime?",
+    "what is the status of my complaint",
+    "Is this the place for missing persons?",
+    "show me the most wanted list",
+    "hi",
+    "this is something else entirely",
+]
+
+
+class NoLimitConfig(Config):
+    RATELIMIT_ENABLED = False
+
+
+def rate(count, seconds):
+    return f"{count / seconds:,.0f}/s"
+
+
+def time_requests(app, count):
+    client = app.test_client()
+    start = time.perf_counter()
+    for i in range(count):
+        response = client.post('/ask_ai', json={'message': MESSAGES[i % len(MESSAGES)]})
+        assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = create_app(NoLimitConfig)
+    with app.app_context():
+        engine = get_intent_engine()
+
+    # Every message unique, so nothing is served from the cache.
+    unique = [f"{MESSAGES[i % len(MESSAGES)]} {i}" for i in range(args.requests)]
+    start = time.perf_counter()
+    for message in unique:
+        engine.reply(message)
+    print(f"engine, uncached:  {rate(args.requests, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    for i in range(args.requests):
+        engine.reply(MESSAGES[i % len(MESSAGES)])
+    print(f"engine, cached:    {rate(args.requests, time.perf_counter() - start)}")
+
+    unlimited = time_requests(app, args.requests)
+    print(f"POST /ask_ai:      {rate(args.requests, unlimited)}  (rate limiting off)")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        class LimitedConfig(Config):
+            RATELIMIT_STORAGE_URL = f"sqlite:///{workdir}/ratelimit.db"
+            RATELIMITS = dict(Config.RATELIMITS, ask_ai=(10 ** 9, 1))
+
+        limited = time_requests(create_app(LimitedConfig), args.requests)
+        print(f"POST /ask_ai:      {rate(args.requests, limited)}  (SQLite rate limiting, "
+              f"+{(limited - unlimited) / args.requests * 1e6:.0f}us per request)")
+
+        store = SQLiteBucketStore(os.path.join(workdir, 'takes.db'))
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            store.take('bench', 10 ** 9, 1)
+        print(f"bucket take:       {rate(args.requests, time.perf_counter() - start)}  (BEGIN IMMEDIATE write alone)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
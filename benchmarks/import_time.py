@@ -0,0 +1,59 @@
+"""Measure how long it takes to import the app and build it.
+
+Runs ``python -X importtime`` in a fresh interpreter for each sample so
+nothing is shared between runs, then reports the median cost of importing
+the ``app`` package and building the application and the packages that cost the most.
+
+    python benchmarks/import_time.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNIPPET = ("import time; start = time.perf_counter(); import app; "
+           "getattr(app, 'create_app', lambda: None)(); print(time.perf_counter() - start)")
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def sample():
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', SNIPPET],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    modules, packages = {}, {}
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = int(cumulative_us)
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0) + int(self_us)
+    return float(proc.stdout.strip()), modules, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    walls = [wall for wall, _, _ in samples]
+    app_times = [modules.get('app', 0) for _, modules, _ in samples]
+    _, last, last_packages = samples[-1]
+
+    print(f"runs: {args.runs}")
+    print(f"modules imported: {len(last)}")
+    print(f"median 'app' import: {statistics.median(app_times) / 1000:.1f} ms")
+    print(f"median import + create_app(): {statistics.median(walls) * 1000:.1f} ms")
+    print(f"heavy modules loaded: "
+          f"{', '.join(m for m in ('PIL', 'requests', 'bs4', 'pandas') if m in last) or 'none'}")
+    print(f"top {args.top} packages by self time (last run):")
+    for us, name in sorted(((v, k) for k, v in last_packages.items()), reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
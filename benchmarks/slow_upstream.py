@@ -0,0 +1,169 @@
+"""How many slow-upstream requests can one worker hold without blocking others?
+
+Starts a fake news site that takes --delay seconds per response and points
+the app's NEWS_URL at it with the page cache disabled. Then, for each worker
+class, it boots gunicorn with a single worker and fires --slow concurrent
+requests at /home (each waits on the fake site) together with --fast
+requests at /login and --posts login POSTs. The POSTs all come from one
+client, so each takes a token from the rate limiter's SQLite bucket and
+most are throttled with a 429. It reports the wall time for the whole batch
+and the worst /login and POST latencies, which stay low only if slow
+requests and rate-limit writes don't block the worker.
+
+    python benchmarks/slow_upstream.py [--slow 50] [--fast 20] [--posts 20] [--delay 1.0]
+"""
+import argparse
+import http.server
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_slow_upstream(delay):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            body = b"<html><body>no articles</body></html>"
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            response.read()
+            ok = response.status == 200
+    except OSError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+def timed_post(url):
+    # A throttled POST answered with 429 still counts: it was served.
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, data=b'email=a%40example.com&password=x', timeout=120) as response:
+            response.read()
+            ok = True
+    except urllib.error.HTTPError as e:
+        ok = e.code == 429
+    except OSError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+class StartupError(Exception):
+    def __init__(self, reason, log):
+        log.flush()
+        log.seek(0)
+        tail = log.read().strip().splitlines()[-15:]
+        super().__init__('\n'.join([reason] + [f"    {line}" for line in tail]))
+
+
+def run(worker_class, upstream_url, args, workdir):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class, WEB_CONCURRENCY='1', PORT=str(port),
+               GUNICORN_THREADS=str(args.threads), NEWS_URL=upstream_url, CACHE_TYPE='NullCache',
+               DATABASE_URL=f"sqlite:///{workdir}/bench.db",
+               ARCHIVE_DATABASE_URL=f"sqlite:///{workdir}/archive.db",
+               RATELIMIT_STORAGE_URL=f"sqlite:///{workdir}/ratelimit.db")
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'w+')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '--timeout', '120', 'run:app'], cwd=ROOT, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + '/login', timeout=1).read()
+                break
+            except OSError:
+                if server.poll() is not None:
+                    break
+                time.sleep(0.1)
+        else:
+            raise StartupError(f"no response on port {port} after 10s", log)
+        if server.poll() is not None:
+            raise StartupError(f"gunicorn exited with status {server.returncode}", log)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.slow + args.fast + args.posts) as pool:
+            # Fast requests go out just after the slow ones are in flight.
+            slow = [pool.submit(timed_get, base + '/home') for _ in range(args.slow)]
+            time.sleep(0.2)
+            fast = [pool.submit(timed_get, base + '/login') for _ in range(args.fast)]
+            posts = [pool.submit(timed_post, base + '/login') for _ in range(args.posts)]
+            slow, fast, posts = [f.result() for f in slow], [f.result() for f in fast], [f.result() for f in posts]
+        wall = time.perf_counter() - start
+        return {
+            'wall': wall,
+            'slow_ok': sum(ok for ok, _ in slow),
+            'fast_ok': sum(ok for ok, _ in fast),
+            'fast_worst': max((t for _, t in fast), default=0),
+            'post_ok': sum(ok for ok, _ in posts),
+            'post_worst': max((t for _, t in posts), default=0),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slow', type=int, default=50, help='concurrent requests to /home')
+    parser.add_argument('--fast', type=int, default=20, help='concurrent requests to /login')
+    parser.add_argument('--posts', type=int, default=20, help='concurrent rate-limited POSTs to /login')
+    parser.add_argument('--delay', type=float, default=1.0, help='upstream delay in seconds')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--worker-class', action='append', dest='worker_classes',
+                        help='sync, gthread or gevent (repeatable; default: all three)')
+    args = parser.parse_args()
+
+    upstream = start_slow_upstream(args.delay)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}/"
+    print(f"{args.slow} x /home (upstream {args.delay:.1f}s) + {args.fast} x /login "
+          f"+ {args.posts} x POST /login, one worker")
+    print(f"{'worker':>8} {'wall':>8} {'/home ok':>9} {'/login ok':>10} {'worst /login':>13} "
+          f"{'POST ok':>8} {'worst POST':>11}")
+    for worker_class in args.worker_classes or ['sync', 'gthread', 'gevent']:
+        workdir = tempfile.mkdtemp()
+        try:
+            result = run(worker_class, upstream_url, args, workdir)
+        except StartupError as e:
+            print(f"{worker_class:>8} failed to start: {e}")
+            continue
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        print(f"{worker_class:>8} {result['wall']:>7.2f}s {result['slow_ok']:>9} "
+              f"{result['fast_ok']:>10} {result['fast_worst']:>12.2f}s "
+              f"{result['post_ok']:>8} {result['post_worst']:>10.2f}s")
+
+
+if __name__ == '__main__':
+    main()
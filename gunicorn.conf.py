@@ -0,0 +1,70 @@
+# Gunicorn picks this file up automatically: `gunicorn run:app` (see Procfile)
+#
+# Serving modes, chosen with GUNICORN_WORKER_CLASS:
+#
+#   gthread (default)  Each worker runs GUNICORN_THREADS threads. A request
+#                      waiting on the news site, SMTP or an admin event stream
+#                      holds one thread; the others keep serving.
+#   gevent             Each worker runs up to GUNICORN_WORKER_CONNECTIONS
+#                      greenlets. Sockets are cooperative, so waiting requests
+#                      cost almost nothing. Used by the Procfile.
+#   sync               One request per worker at a time. Not recommended: any
+#                      slow upstream or event stream blocks the whole worker.
+#
+# Database sessions are scoped to the request's app context, so they are
+# never shared between threads or greenlets.
+#
+# benchmarks/slow_upstream.py measures the difference: one worker, 50
+# requests whose upstream takes 1s, plus 20 quick page loads.
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so the locks and sockets it creates
+    # at import time are already cooperative.
+    from gevent import monkey
+    monkey.patch_all()
+    # An idle event stream is one parked greenlet, so allow many more.
+    os.environ.setdefault('SSE_MAX_STREAMS', '100')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Threaded workers: an open admin event stream (/admin/events) holds one
+# thread, not the whole worker. SSE_MAX_STREAMS caps streams per worker
+# below this so the other threads keep serving pages.
+# (gunicorn silently turns 'sync' into gthread if threads > 1.)
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Build the app once in the master and fork workers from it, so the imported
+# code is shared copy-on-write instead of loaded again by every worker.
+preload_app = True
+
+
+def on_starting(server):
+    # Once, in the master, before any worker serves a request: create missing
+    # tables and apply schema changes (app/schema.py), then fingerprint and
+    # precompress static assets.
+    from run import app
+    from app.assets import build_assets
+    from app.schema import create_schema
+    with app.app_context():
+        create_schema()
+        build_assets()
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers fork.
+    from app import preload_heavy_modules
+    preload_heavy_modules()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared across processes.
+    from app import db
+    from run import app
+    with app.app_context():
+        db.engine.dispose()
@@ -1,10 +1,13 @@
-from app import app, db
+from app import create_app
+
+app = create_app()
 
 # The 'if __name__ == "__main__"' block is no longer needed for Heroku,
 # but it's good practice to keep it for local testing.
-# Gunicorn will directly access the 'app' object.
+# Gunicorn will directly access the 'app' object (see gunicorn.conf.py).
 if __name__ == '__main__':
+    # Gunicorn does this in on_starting; with `flask run`, use `flask init-db`.
+    from app.schema import create_schema
     with app.app_context():
-        db.create_all()
+        create_schema()
     app.run(debug=True)
-    
\ No newline at end of file